@@ -2,7 +2,7 @@
 Bigdict
 """
 
-__version__ = '0.3.6'
+__version__ = '0.3.7'
 
 from ._bigdict import Bigdict, ReadonlyError
 
@@ -5,17 +5,51 @@ import json
 import os
 import os.path
 import pickle
+import queue
 import shutil
+import struct
+import sys
 import tempfile
-import uuid
+import threading
+import zlib
 from collections import defaultdict
 from collections.abc import Iterable, Iterator, Mapping, MutableMapping
+from concurrent.futures import ThreadPoolExecutor
 from hashlib import blake2b
 from multiprocessing.util import Finalize
+from operator import itemgetter
 from typing import Generic, TypeVar
 
 import lmdb
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+# `orjson` is optional (install the "perf" extra). `info.json` is tiny,
+# but it is parsed on every object construction; high-churn workloads
+# that open many Bigdict objects notice the difference.
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+# `xxhash` is optional (install the "perf" extra). It backs the 'xxh3'
+# shard-hash choice; the other choices need only the stdlib.
+
+
+def _info_loads(data: bytes) -> dict:
+    if orjson is None:
+        return json.loads(data)
+    return orjson.loads(data)
+
+
+def _info_dumps(info: dict) -> bytes:
+    if orjson is None:
+        return json.dumps(info).encode('utf-8')
+    return orjson.dumps(info)
+
+
 NOTSET = object()
 
 KeyType = str
@@ -45,12 +79,55 @@ class Bigdict(MutableMapping, Generic[ValType]):
     At the end of a writing session, call :meth:`flush`.
     """
 
+    __slots__ = (
+        '__weakref__',
+        # Needed by the `Finalize` registration in `__init__`.
+        # (`MutableMapping` and `Generic` both have empty `__slots__`,
+        # so without this the instances would have no weakref support.)
+        'path',
+        'info',
+        '_info_saved',
+        '_storage_version',
+        '_key_pickle_protocol',
+        '_value_format',
+        '_shard_level',
+        '_shard_hash',
+        '_map_size_mb',
+        '_max_readers',
+        '_max_open_envs',
+        '_readonly',
+        '_append_only',
+        '_lock',
+        '_sync',
+        '_metasync',
+        '_db_dir',
+        '_shard_paths',
+        '_shards_cache',
+        '_shard_fn',
+        '_encode_and_shard',
+        '_setitem',
+        '_getitem',
+        '_dbs',
+        '_transactions',
+        '_write_commit_interval',
+        '_num_pending_writes',
+        'close',
+    )
+    # `__slots__` drops the per-instance `__dict__` and speeds up attribute
+    # access slightly. Subclasses that need ad-hoc attributes get their own
+    # `__dict__` back automatically by simply not defining `__slots__`.
+
+    _SHARD_NAMES = tuple(sys.intern(str(i)) for i in range(256))
+    # The names of all possible shards, precomputed so that `_shard_fn`
+    # does not allocate a new str on every call.
+
     @classmethod
     def new(
         cls,
         path: str = None,
         *,
         shard_level: int = 0,
+        shard_hash: str = 'blake2b',
         **kwargs,
     ):
         """
@@ -65,8 +142,21 @@ class Bigdict(MutableMapping, Generic[ValType]):
             They are directories under ``self.path / 'db'``.
             Data elements will be assigned to the shards in a deterministic
             and hopefully balanced way.
+        shard_hash
+            The hash function that assigns a key to a shard; irrelevant when
+            ``shard_level <= 1``. The default ``'blake2b'`` is what this
+            library has always used. ``'crc32'`` (via :func:`zlib.crc32`) is
+            considerably cheaper per key and just as well spread for this
+            purpose---shard assignment needs uniformity, not cryptographic
+            strength. ``'xxh3'`` (requires the optional ``xxhash`` package)
+            is faster still, especially on long keys. All choices are stable
+            across platforms and Python versions.
+
+            The choice is recorded in ``info.json`` so that readers use
+            the same function.
         """
         assert shard_level in (0, 1, 8, 16, 32, 64, 128, 256)
+        assert shard_hash in ('blake2b', 'crc32', 'xxh3')
         info = {
             'storage_version': 2,
             # `storage_version = 1` is introduced in release 0.2.0.
@@ -76,18 +166,31 @@ class Bigdict(MutableMapping, Generic[ValType]):
             # `storage_version = 2` is introduced in release 0.2.9 in light of
             # a bug in version 1.
             'shard_level': shard_level,
+            'shard_hash': shard_hash,  # Added in 0.3.7. Missing in older datasets, meaning 'blake2b'.
             'key_pickle_protocol': 5,  # Added in 0.2.7. Record this to ensure consistency between insert and query times.
+            'value_format': 1,
+            # Added in 0.3.7. Missing in older datasets, meaning 0: values
+            # are plain pickles. Format 1 additionally uses the tagged
+            # layouts of `encode_value` (raw bytes, out-of-band buffers),
+            # which bigdict <= 0.3.6 cannot read; recording the choice here
+            # keeps writes into pre-0.3.7 datasets readable by the versions
+            # that created them.
         }
 
         if path is None:
-            path = os.path.join(tempfile.gettempdir(), str(uuid.uuid4()))
-        path = os.path.abspath(path)
-        assert not os.path.isdir(path)
-        os.makedirs(path)
-
-        with open(os.path.join(path, 'info.json'), 'w') as file:
-            json.dump(info, file)
-        z = cls(path, readonly=False, **kwargs)
+            # `mkdtemp` creates the directory and guarantees its name unique,
+            # with no window between the existence check and the creation.
+            path = tempfile.mkdtemp(prefix='bigdict-')
+        else:
+            path = os.path.abspath(path)
+            assert not os.path.isdir(path)
+            os.makedirs(path)
+
+        with open(os.path.join(path, 'info.json'), 'wb') as file:
+            file.write(_info_dumps(info))
+            file.flush()
+            os.fsync(file.fileno())
+        z = cls(path, readonly=False, _info=info, **kwargs)
         return z
 
     def __init__(
@@ -96,11 +199,64 @@ class Bigdict(MutableMapping, Generic[ValType]):
         *,
         map_size_mb: int = 1024,
         max_readers: int = 126,
+        max_open_envs: int = 0,
         readonly: bool = True,
+        append_only: bool = False,
+        lock: bool = True,
+        sync: bool = False,
+        metasync: bool = False,
+        _info: dict = None,
     ):
         """
         Parameters
         ----------
+        sync, metasync
+            Passed through to ``lmdb.Environment``. The defaults (both
+            ``False``) skip the fsync/msync on every transaction commit;
+            durability is provided at the documented checkpoint instead,
+            when :meth:`flush` calls ``sync(True)`` on each environment.
+            A crash before `flush` may lose the writes since the last sync,
+            but never corrupts the database.
+
+            Set ``sync=True`` if every :meth:`commit` must survive a power
+            failure; expect a large slowdown for small writes, as the
+            per-commit fsync then dominates wall time. ``metasync=True``
+            alone is a middle ground: the meta page is flushed per commit,
+            the data pages on `flush`.
+
+            Like ``map_size_mb``, these are per-session choices, not
+            attributes of the dataset.
+        lock
+            If ``False``, the LMDB environments are opened without their
+            lock file (``MDB_NOLOCK``): read transactions skip the
+            reader-table slot bookkeeping that every ``txn.get`` otherwise
+            pays for. Only do this when this object is the *sole* user of
+            the dataset---no other ``Bigdict`` object in this or any other
+            process, no concurrent threads. With the locks gone, LMDB does
+            nothing to protect readers from a concurrent writer reclaiming
+            the pages under them.
+        append_only
+            If ``True``, :meth:`update` tells LMDB the batch extends the
+            database at the right edge (``putmulti(..., append=True)``),
+            which skips the B+tree descent and key comparisons and fills
+            leaf pages back to back. Only use this for bulk loads where
+            every batch's keys (in *encoded byte order*, per shard) are
+            strictly greater than everything already stored; LMDB rejects
+            an out-of-order key with a ``KEYEXIST`` error.
+        max_open_envs
+            Max number of shard environments to keep open at the same time.
+            The default ``0`` means no limit: once opened, an environment stays
+            open for the life of the object.
+
+            Each open environment holds a mmap of the shard's data file.
+            If the dataset uses many shards (say 256) but a session only
+            reads a sparse selection of keys, a cap (say 32) releases the
+            environments that have not been used recently.
+
+            Leave this at ``0`` if you share the object across threads
+            (e.g. via :meth:`as_readonly`) or interleave several in-flight
+            iterations of :meth:`keys`/:meth:`values`/:meth:`items`:
+            evicting an environment closes it under any reader still using it.
         map_size_mb
             Max size of the database file for one shard.
 
@@ -122,8 +278,19 @@ class Bigdict(MutableMapping, Generic[ValType]):
         """
         self.path = os.path.abspath(path)
 
-        with open(os.path.join(path, 'info.json'), 'r') as file:
-            self.info = json.load(file)
+        if _info is None:
+            with open(os.path.join(path, 'info.json'), 'rb') as file:
+                self.info = _info_loads(file.read())
+        else:
+            # `new` has just written `info.json` with exactly this dict;
+            # reading it back would be a pointless round-trip.
+            self.info = _info
+        self._info_saved = _info_dumps(self.info)
+        # What `info.json` would look like if saved now; `flush` skips the
+        # rewrite (and its fsync) when the serialized form has not changed.
+        # (Not `info_bytes` itself: the file on disk may be formatted
+        # differently than `_info_dumps` output, e.g. written by an older
+        # version.)
 
         self._storage_version = self.info.get('storage_version', 0)
         if self._storage_version == 0:
@@ -136,7 +303,14 @@ class Bigdict(MutableMapping, Generic[ValType]):
         # This value is in `self.info` starting with 0.2.7.
 
         self._shard_level = self.info.get('shard_level', 0)
-        # DO NOT EVER manually modify ``self._storage_version`` and ``self._shard_level``.
+        self._shard_hash = self.info.get('shard_hash', 'blake2b')
+        self._value_format = self.info.get('value_format', 0)
+        # This value is in `self.info` starting with 0.3.7.
+        # In a dataset created by an older version, new writes stick to
+        # plain pickles (format 0) so that the dataset remains readable
+        # by the version that created it.
+        # DO NOT EVER manually modify ``self._storage_version``, ``self._shard_level``,
+        # ``self._shard_hash``, and ``self._value_format``.
 
         if self._storage_version == 1 and self._shard_level > 1:
             # "storage version 1" has a bug when "shard level > 1" so that persisted datasets
@@ -147,9 +321,24 @@ class Bigdict(MutableMapping, Generic[ValType]):
 
         self._map_size_mb = map_size_mb
         self._max_readers = max_readers
+        self._max_open_envs = max_open_envs
         self._readonly = readonly
+        self._append_only = append_only
+        self._lock = lock
+        self._sync = sync
+        self._metasync = metasync
+        self._db_dir = os.path.join(self.path, 'db')
+        self._shard_paths = {}
+        self._shards_cache = None
+        self._shard_fn = self._make_shard_fn()
+        self._encode_and_shard = self._make_encode_and_shard()
+        # Per-shard directory paths, filled in lazily.
+        # Building these strings with `os.path.join` on every operation
+        # shows up in profiles of high-QPS workloads.
         self._dbs = {'refcount': 1, 'dbs': {}}
         self._transactions = {}
+        self._setitem = self._make_setitem()
+        self._getitem = self._make_getitem()
 
         self._write_commit_interval = 100_000
         # You may change this value during the lifetime of the object.
@@ -254,46 +443,186 @@ class Bigdict(MutableMapping, Generic[ValType]):
         if self._shard_level <= 1:
             return ['0']
 
+        shards = self._shards_cache
+        if shards is not None:
+            return shards
+        # The listing is cached because `keys`/`values`/`items`/`__len__`
+        # call this on every invocation while the set of shard directories
+        # rarely changes after a dataset is populated---but it is cached
+        # only once every permitted shard exists, because then the set can
+        # never change again. A partial listing is re-taken every time:
+        # another writer (in this or another process) may create the
+        # missing directories at any moment, and a readonly object has no
+        # other way to notice. (This object's own shard-creating writes
+        # additionally drop the cache in `_env`.)
+
         files = []
         try:
-            for f in os.listdir(os.path.join(self.path, 'db')):
-                try:
-                    f = int(f)
-                except ValueError:
-                    pass
-                else:
-                    files.append(f)
+            with os.scandir(self._db_dir) as entries:
+                for entry in entries:
+                    try:
+                        f = int(entry.name)
+                    except ValueError:
+                        pass
+                    else:
+                        files.append(f)
             if files:
                 files = [str(f) for f in sorted(files)]
         except (FileNotFoundError, NotADirectoryError):
             pass
+        if len(files) == self._shard_level:
+            self._shards_cache = files
         return files
 
-    def _shard(self, key: bytes) -> str:
+    def _make_shard_fn(self):
+        # The shard of a key is determined by `storage_version` and `shard_level`,
+        # which are fixed for the life of the object. Evaluate those branches once
+        # and return a small closure; the per-key work that remains is one hash
+        # call plus one mask. (Specializing `__getitem__` and friends directly
+        # is not an option---CPython looks up dunder methods on the type,
+        # not on the instance---but they all funnel through this function.)
         sv = self._storage_version
         sl = self._shard_level
         if sv < 1 or sl <= 1:
-            return '0'
-        if sv == 2:
-            if len(key) == 0:  # TODO: should we allow empty key value?
-                return '0'
-            base = blake2b(key, digest_size=1).digest()[0]  # 1 byte, used as int
-            if sl == 8:
-                base &= 0b111  # keep the right-most 3 bits, 0 ~ 7
-            elif sl == 16:
-                base &= 0b1111  # keep the right-most 4 bits, 0 ~ 15
-            elif sl == 32:
-                base &= 0b11111  # keep the right-most 5 bits, 0 ~ 31
-            elif sl == 64:
-                base &= 0b111111  # keep the right-most 6 bits, 0 ~ 63
-            elif sl == 128:
-                base &= 0b1111111  # keep the right-most 7 bits, 0 ~ 127
-            elif sl == 256:
-                pass  # keep all 8 bits, 0 ~ 255
+            return lambda key: '0'
+        if sv != 2:
+            raise ValueError(f'storage-version {sv}')
+        if sl & (sl - 1) or not 8 <= sl <= 256:
+            # Accepted values (see :meth:`new`) are powers of two;
+            # a power of two has no bit in common with its predecessor.
+            raise ValueError(f'shard-level {sl}')
+        mask = sl - 1  # keep the right-most log2(sl) bits, 0 ~ sl-1
+
+        if self._shard_hash == 'crc32':
+
+            def shard(
+                key: bytes, *, _crc32=zlib.crc32, _mask=mask, _names=self._SHARD_NAMES
+            ) -> str:
+                if len(key) == 0:  # TODO: should we allow empty key value?
+                    return '0'
+                return _names[_crc32(key) & _mask]
+
+        elif self._shard_hash == 'xxh3':
+            if xxhash is None:
+                raise ImportError(
+                    "shard-hash 'xxh3' requires the package `xxhash` (the 'perf' extra)"
+                )
+
+            def shard(
+                key: bytes,
+                *,
+                _xxh3=xxhash.xxh3_64_intdigest,
+                _mask=mask,
+                _names=self._SHARD_NAMES,
+            ) -> str:
+                if len(key) == 0:  # TODO: should we allow empty key value?
+                    return '0'
+                return _names[_xxh3(key) & _mask]
+
+        elif self._shard_hash == 'blake2b':
+
+            def shard(
+                key: bytes, *, _blake2b=blake2b, _mask=mask, _names=self._SHARD_NAMES
+            ) -> str:
+                if len(key) == 0:  # TODO: should we allow empty key value?
+                    return '0'
+                base = _blake2b(key, digest_size=1).digest()[0]  # 1 byte, used as int
+                return _names[base & _mask]
+
+        else:
+            raise ValueError(f'shard-hash {self._shard_hash}')
+
+        return shard
+
+    def _shard(self, key: bytes) -> str:
+        return self._shard_fn(key)
+
+    def _make_encode_and_shard(self):
+        # Fuse `encode_key` and `_shard` into a single call for the hot paths,
+        # specialized like `_make_shard_fn`. With the default `encode_key` and
+        # a single shard, a key costs exactly one `str.encode` call.
+        shard_fn = self._shard_fn
+        if type(self).encode_key is Bigdict.encode_key:
+            if self._shard_level <= 1 or self._storage_version < 1:
+
+                def encode_and_shard(key: KeyType) -> tuple[bytes, str]:
+                    return key.encode('utf-8'), '0'
             else:
-                raise ValueError(f'shard-level {sl}')
-            return str(base)
-        raise ValueError(f'storage-version {sv}')
+
+                def encode_and_shard(key: KeyType) -> tuple[bytes, str]:
+                    k = key.encode('utf-8')
+                    return k, shard_fn(k)
+        else:
+            encode_key = self.encode_key
+
+            def encode_and_shard(key: KeyType) -> tuple[bytes, str]:
+                k = encode_key(key)
+                return k, shard_fn(k)
+
+        return encode_and_shard
+
+    def _make_setitem(self):
+        # The write counterpart of `_make_encode_and_shard`. `bd[k] = v` is
+        # dispatched on the type, so the dunder itself cannot be replaced
+        # per instance; instead `__setitem__` stays a thin shim over this
+        # closure, which hoists the attribute and method lookups of the
+        # insert path out of the per-call work. When the transaction for the
+        # target shard is already open (the common case in a write loop),
+        # an insert is the two encode calls plus a dict lookup and the C-level
+        # `put`.
+        encode_and_shard = self._encode_and_shard
+        encode_value = self.encode_value
+        transactions = self._transactions
+        # `_transactions` is mutated only in place (see `__init__`), so the
+        # captured reference stays valid across `commit`/`flush`.
+        transaction = self._transaction
+        track_write = self._track_write
+
+        if self._shard_level <= 1 or self._storage_version < 1:
+            # Single shard: there is exactly one write transaction to talk
+            # to, so cache its `put` directly and skip even the dict lookup.
+            # `commit` and `destroy` close the transaction and rebuild this
+            # closure, which drops the stale bound method.
+            put = None
+
+            def setitem(key: KeyType, value: ValType) -> None:
+                nonlocal put
+                k, _ = encode_and_shard(key)
+                v = encode_value(value)
+                if put is None:
+                    put = transaction('0').put
+                put(k, v)
+                # This raises ReadonlyError if `self.readonly` is True.
+                track_write(1)
+
+        else:
+            # Sharded: cache the bound `put` of each shard's transaction,
+            # saving the attribute lookup on the transaction object per call.
+            # Like `put` above, the cache dies with this closure when
+            # `commit`/`destroy` rebuild it, so no stale bound method
+            # survives a transaction.
+            puts = {}
+
+            def setitem(key: KeyType, value: ValType) -> None:
+                k, shard = encode_and_shard(key)
+                v = encode_value(value)
+                put = puts.get(shard)
+                if put is None:
+                    txn = transactions.get(shard)
+                    if txn is None:
+                        txn = transaction(shard)
+                    put = puts.setdefault(shard, txn.put)
+                put(k, v)
+                # This raises ReadonlyError if `self.readonly` is True.
+                track_write(1)
+
+        return setitem
+
+    def _shard_path(self, shard: str) -> str:
+        p = self._shard_paths.get(shard)
+        if p is None:
+            p = self._shard_paths.setdefault(shard, os.path.join(self._db_dir, shard))
+        return p
 
     def _env(self, shard: str):
         map_size = self.map_size_mb * 1048576  # 1048576 is 2**20, or 1 MB
@@ -320,25 +649,71 @@ class Bigdict(MutableMapping, Generic[ValType]):
         #         **config,
         #     )
 
-        os.makedirs(os.path.join(self.path, 'db', shard), exist_ok=True)
+        os.makedirs(self._shard_path(shard), exist_ok=True)
+        self._shards_cache = None
+        # The directory set may have just grown; let `_shards` re-list.
         db = lmdb.Environment(
-            os.path.join(self.path, 'db', shard),
+            self._shard_path(shard),
             readonly=False,
             subdir=True,
             readahead=False,
             map_size=map_size,
+            lock=self._lock,
             writemap=True,
             map_async=True,
+            sync=self._sync,
+            metasync=self._metasync,
+            # By default, do not fsync on every transaction commit (with `writemap`, that
+            # would be one msync of the map plus one fsync of the meta page
+            # per commit). Durability is provided at the documented checkpoint
+            # instead: :meth:`flush` calls ``sync(True)`` on each environment.
+            # On a crash or power failure before `flush`, the transactions
+            # since the last sync may be lost, but the database does not get
+            # corrupted---LMDB's copy-on-write pages keep the last synced
+            # state intact. This matches the write-then-read usage pattern
+            # described in the class docstring.
             max_readers=self._max_readers,
+            max_spare_txns=8,
+            # `lmdb` does not expose `mdb_txn_reset`/`mdb_txn_renew` directly;
+            # instead, `Environment.begin` recycles up to `max_spare_txns`
+            # finished read transactions via `mdb_txn_renew`, which skips the
+            # reader-table slot allocation that dominates small reads.
+            # The read methods of this class open a transaction per call,
+            # so they hit this cache constantly. The default cache size is 1;
+            # a few more helps when a readonly object is shared among threads
+            # (see :meth:`as_readonly`). Each spare transaction keeps its reader
+            # slot reserved, hence this should stay well below `max_readers`.
         )
         db.__enter__()
+        # `readahead=False` above stops the kernel's speculative reads on
+        # LMDB's mapping (MDB_NORDAHEAD), which is the right default for
+        # random access to datasets larger than RAM. Access-pattern hints
+        # beyond that flag were tried and removed: `posix_fadvise` applies
+        # to the open file description it is issued on, not to LMDB's
+        # existing mmap from another fd, and `madvise` on the mapping
+        # itself is out of reach because the `lmdb` binding does not expose
+        # the map address (``Environment.info()['map_addr']`` is 0 without
+        # MDB_FIXEDMAP).
         return db
 
     def _db(self, shard: str = '0'):
-        db = self._dbs['dbs'].get(shard, None)
+        dbs = self._dbs['dbs']
+        db = dbs.get(shard, None)
         if db is None:
+            if self._max_open_envs and len(dbs) >= self._max_open_envs:
+                # Evict least-recently-used environments (dict order is
+                # maintained below on each hit), but never one with a live
+                # transaction of this object.
+                for s in list(dbs.keys()):
+                    if s in self._transactions:
+                        continue
+                    dbs.pop(s).__exit__()
+                    if len(dbs) < self._max_open_envs:
+                        break
             db = self._env(shard)
-            self._dbs['dbs'][shard] = db
+            dbs[shard] = db
+        elif self._max_open_envs:
+            dbs[shard] = dbs.pop(shard)  # refresh recency order
         return db
 
     def _transaction(self, shard: str = '0'):
@@ -457,6 +832,9 @@ class Bigdict(MutableMapping, Generic[ValType]):
         self._num_pending_writes = 0
 
         self._transactions.clear()
+        self._setitem = self._make_setitem()
+        # The insert closure may hold a `put` bound to a transaction that
+        # was just committed; rebuilding it drops that reference.
         # if not self.readonly:
         #     for db in self._dbs.values():
         #         db.sync()
@@ -472,12 +850,43 @@ class Bigdict(MutableMapping, Generic[ValType]):
         It is user's responsibility to call `flush` or `commit` to persist any change
         to the data. There is some "finalizer" code that does resource cleanup; it does NOT
         promise to save user's uncommitted changes.
+
+        The environments are opened with ``sync=False``: committed transactions
+        are not fsync'ed one by one. ``flush`` is the moment they are forced to disk;
+        a crash before ``flush`` may lose writes since the previous ``flush``,
+        but does not corrupt the dataset.
         """
         self.commit()
-        with open(os.path.join(self.path, 'info.json'), 'w') as file:
-            json.dump(self.info, file)
-        for db in self._dbs['dbs'].values():
-            db.sync(True)
+        info_bytes = _info_dumps(self.info)
+        if info_bytes != self._info_saved:
+            # Skip the rewrite-plus-fsync when `self.info` is unchanged,
+            # which is the common case when `flush` punctuates a long
+            # writing session.
+            # Write-to-temp plus rename: a crash mid-write leaves the old
+            # `info.json` intact rather than a truncated file, and a
+            # concurrent reader never observes a partial write.
+            tmp = os.path.join(self.path, 'info.json.tmp')
+            with open(tmp, 'wb') as file:
+                file.write(info_bytes)
+                file.flush()
+                os.fsync(file.fileno())
+                # `flush` is the documented durability checkpoint; make sure
+                # `info.json` has actually reached the disk before returning,
+                # like `db.sync(True)` below does for the data files.
+            os.replace(tmp, os.path.join(self.path, 'info.json'))
+            self._info_saved = info_bytes
+        dbs = list(self._dbs['dbs'].values())
+        if len(dbs) > 1:
+            # One fsync per shard; issue them concurrently rather than
+            # serially. `Environment.sync` releases the GIL, and the kernel
+            # can flush independent files in parallel, so the wall time for
+            # a 16-shard flush approaches that of a single fsync.
+            n = min(len(dbs), os.cpu_count() or 1)
+            with ThreadPoolExecutor(n) as pool:
+                for _ in pool.map(lambda db: db.sync(True), dbs):
+                    pass
+        elif dbs:
+            dbs[0].sync(True)
 
     def encode_key(self, k: KeyType) -> bytes:
         """
@@ -509,50 +918,165 @@ class Bigdict(MutableMapping, Generic[ValType]):
 
         If a subclass uses bytes values, it may want to customize :meth:`encode_value` and
         :meth:`decode_value` to skip encoding and decoding.
+        (The default already stores a plain `bytes` value raw, behind a
+        1-byte tag; a pass-through subclass additionally saves that byte
+        and the copy on read, and pairs with :meth:`get_buffer`.)
         """
-        return pickle.dumps(v, protocol=pickle.HIGHEST_PROTOCOL)
+        if not self._value_format:
+            # The dataset was created before the tagged layouts below existed
+            # (see `new`); keep writing plain pickles so it stays readable
+            # by the bigdict version that created it.
+            return pickle.dumps(v, protocol=5)
+        if type(v) is bytes:
+            # A raw `bytes` value needs no pickling at all: store it behind a
+            # 1-byte tag. The concatenation is one memcpy; `pickle.dumps`
+            # costs several times that even for large payloads, and an order
+            # of magnitude more for small ones. Exactly `bytes` only---a
+            # bytearray or memoryview would come back as `bytes`, breaking
+            # the round-trip.
+            return b'\x02' + v
+        # Use pickle protocol 5 with out-of-band buffers so that buffer-exporting
+        # values (e.g. numpy arrays) are appended to the output raw, skipping the
+        # memcpy through the pickle stream. For values that export no buffer
+        # (all "native" Python objects), the output is a plain pickle, identical
+        # to what previous versions produced.
+        buffers = []
+        head = pickle.dumps(v, protocol=5, buffer_callback=buffers.append)
+        if not buffers:
+            return head
+        # Self-describing layout:
+        #
+        #   b'\x01' | num buffers | len(head) | len of each buffer | head | raw buffers
+        #
+        # with all lengths as little-endian uint64.
+        # The leading b'\x01' (like the b'\x02' of the raw-bytes layout above)
+        # can't be confused with a plain pickle, because pickles of
+        # protocol 2+ always start with b'\x80'.
+        raws = [b.raw() for b in buffers]
+        header = struct.pack(
+            f'<B{len(raws) + 2}Q', 1, len(raws), len(head), *(len(r) for r in raws)
+        )
+        return b''.join((header, head, *raws))
 
     def decode_value(self, v: bytes) -> ValType:
-        return pickle.loads(v)
+        if v[0] == 2:
+            # A raw `bytes` value; see :meth:`encode_value`.
+            # Slicing a memoryview (the `buffers=True` paths) is zero-copy;
+            # `bytes(...)` then makes the one copy that must outlive the
+            # transaction.
+            return v[1:] if type(v) is bytes else bytes(v[1:])
+        if v[0] != 1:
+            # A plain pickle (starts with b'\x80'); this includes all data
+            # persisted by versions before 0.3.7.
+            return pickle.loads(v)
+        mv = memoryview(v)
+        nbufs, headlen = struct.unpack_from('<QQ', mv, 1)
+        lengths = struct.unpack_from(f'<{nbufs}Q', mv, 17)
+        pos = 17 + nbufs * 8
+        head = mv[pos : pos + headlen]
+        pos += headlen
+        buffers = []
+        for n in lengths:
+            buffers.append(mv[pos : pos + n])
+            pos += n
+        if not isinstance(v, bytes):
+            # `v` may be a memoryview over a LMDB page (see `buffers=True` usages),
+            # which becomes invalid once the enclosing transaction ends.
+            # Copy the buffers so that the reconstructed value owns its memory.
+            buffers = [bytes(b) for b in buffers]
+        return pickle.loads(head, buffers=buffers)
 
     def __setitem__(self, key: KeyType, value: ValType) -> None:
-        key = self.encode_key(key)
-        shard = self._shard(key)
-        value = self.encode_value(value)
-        self._transaction(shard).put(key, value)
-        # This raises ReadonlyError if `self.readonly` is True.
-        self._track_write(1)
+        self._setitem(key, value)
 
-    def __getitem__(self, key: KeyType) -> ValType:
-        k = self.encode_key(key)
-        shard = self._shard(k)
+    def _make_getitem(self):
+        # The read counterpart of `_make_setitem`; `__getitem__` is a thin
+        # shim over the closure built here.
+        encode_and_shard = self._encode_and_shard
+        decode_value = self.decode_value
+
+        if self.readonly:
+            # Using a new transaction on each read.
+            # If other objects have written, as long as they have committed,
+            # the changes will be visible to this read.
+            # If this reuses an existing readonly transaction,
+            # then this transaction wouldn't see changes made by other
+            # clients.
+            #
+            # With ``buffers=True``, `get` returns a memoryview over the
+            # mmap'ed data file rather than a bytes copy. The view is only
+            # valid inside the transaction, hence decoding happens here.
+            # That is safe for the default `decode_value`, which fully
+            # consumes the buffer before returning; an overriding subclass
+            # may be a pass-through whose "decoded" view would escape the
+            # transaction, so it gets a plain `begin()` and bytes (same
+            # guard as the scan methods `values`/`items`).
+            db = self._db
+            buffers = type(self).decode_value is Bigdict.decode_value
+
+            if (
+                self._shard_level <= 1 or self._storage_version < 1
+            ) and not self._max_open_envs:
+                # Single shard whose environment, once opened, stays open for
+                # the life of the object: cache its `begin` directly.
+                begin = None
+
+                def getitem(key: KeyType) -> ValType:
+                    nonlocal begin
+                    k, _ = encode_and_shard(key)
+                    if begin is None:
+                        begin = db('0').begin
+                    try:
+                        with begin(buffers=buffers) as txn:
+                            v = txn.get(k)
+                            if v is not None:
+                                return decode_value(v)
+                    except lmdb.PageNotFoundError:
+                        raise KeyError(key)
+                    raise KeyError(key)
 
-        try:
-            if self.readonly:
-                with self._db(shard).begin() as txn:
-                    v = txn.get(k)
-                    # Using a new transaction on each read.
-                    # If other objects have written, as long as they have committed,
-                    # the changes will be visible to this read.
-                    # If this reuses an existing readonly transaction,
-                    # then this transaction wouldn't see changes made by other
-                    # clients.
             else:
-                v = self._transaction(shard).get(k)
-                # In a read-write env, this will use the existing transaction,
-                # which may have just written but haven't committed;
-                # those writes will be visible here.
-        except lmdb.PageNotFoundError:
-            raise KeyError(key)
-        # `v` can't be `None` as a valid return from the db,
-        # because all values are bytes.
-        if v is None:
-            raise KeyError(key)
-        return self.decode_value(v)
+
+                def getitem(key: KeyType) -> ValType:
+                    k, shard = encode_and_shard(key)
+                    try:
+                        with db(shard).begin(buffers=buffers) as txn:
+                            v = txn.get(k)
+                            if v is not None:
+                                return decode_value(v)
+                    except lmdb.PageNotFoundError:
+                        raise KeyError(key)
+                    raise KeyError(key)
+
+        else:
+            # In a read-write object, this uses the existing transaction,
+            # which may have just written but haven't committed;
+            # those writes will be visible here.
+            transactions = self._transactions
+            transaction = self._transaction
+
+            def getitem(key: KeyType) -> ValType:
+                k, shard = encode_and_shard(key)
+                txn = transactions.get(shard)
+                if txn is None:
+                    txn = transaction(shard)
+                try:
+                    v = txn.get(k)
+                except lmdb.PageNotFoundError:
+                    raise KeyError(key)
+                # `v` can't be `None` as a valid return from the db,
+                # because all values are bytes.
+                if v is None:
+                    raise KeyError(key)
+                return decode_value(v)
+
+        return getitem
+
+    def __getitem__(self, key: KeyType) -> ValType:
+        return self._getitem(key)
 
     def __delitem__(self, key: KeyType) -> None:
-        k = self.encode_key(key)
-        shard = self._shard(k)
+        k, shard = self._encode_and_shard(key)
         z = self._transaction(shard).delete(k)
         # This raises ReadonlyError if `self.readonly` is True.
         if not z:
@@ -573,12 +1097,15 @@ class Bigdict(MutableMapping, Generic[ValType]):
         If you ever use this method, usually you're using a subclass whose methods
         :meth:`encode_value` and :meth:`decode_value` are both pass-throughs, and
         the values are `bytes`.
+
+        The memoryview is a direct view onto the database pages. It is
+        invalidated by subsequent operations on the database (writes, commit,
+        compact, etc.); consume it, or copy it with ``bytes(...)``, before that.
         """
         if self._num_pending_writes > 0:
             self.commit()
 
-        k = self.encode_key(key)
-        shard = self._shard(k)
+        k, shard = self._encode_and_shard(key)
         try:
             with self._db(shard).begin(write=(not self.readonly), buffers=True) as txn:
                 v = txn.get(k)
@@ -592,38 +1119,64 @@ class Bigdict(MutableMapping, Generic[ValType]):
             return default
         return v
 
-    # def stream_get(self, keys: Iterable[KeyType], default=NOTSET, *, buffers: bool = False) -> Iterable:
-    #     if self._shard_level > 1:
-    #         raise NotImplementedError
-
-    #     if self._num_pending_writes > 0:
-    #         self.commit()
-    #     encode_key = self.encode_key
-    #     decode_value = self.decode_value
-
-    #     with self._db('0').begin(buffers=buffers) as txn:
-    #         with txn.cursor() as cursor:
-    #             for k, v in cursor.getmulti((encode_key(k) for k in keys)):
-    #                 if v is None:
-    #                     if default is NOTSET:
-    #                         raise KeyError(k)
-    #                     v = default
-    #                 else:
-    #                     if not buffers:
-    #                         v = decode_value(v)
-    #                 yield k, v
-    #
-    # Benchmark showed a potential speed gain of up to 30%.
-    # However, I have not verified wether `cursor.getmulti` respects the input order,
-    # and I have not worked on the multi-shard case.
-    # Since read is already quite fast, this optimization may not be that worthwhile.
+    def getmany(self, keys: Iterable[KeyType]) -> dict[KeyType, ValType]:
+        """
+        Retrieve the values of ``keys`` in one pass, returning a dict.
+
+        Keys that are not in the database are silently absent from the result
+        (compare with :meth:`get`).
+
+        The keys are grouped by shard and each group is fetched with a single
+        ``cursor.getmulti`` call, amortizing the per-call overhead over the
+        batch. For large batches this is considerably faster than a loop of
+        :meth:`__getitem__`. (The result is a dict, hence unordered by design;
+        this sidesteps the question of whether ``getmulti`` preserves input
+        order.)
+        """
+        encode_and_shard = self._encode_and_shard
+        decode_key = self.decode_key
+        decode_value = self.decode_value
+
+        sharded = defaultdict(list)
+        for key in keys:
+            k, shard = encode_and_shard(key)
+            sharded[shard].append(k)
+
+        out = {}
+        for shard, ks in sharded.items():
+            try:
+                if self.readonly:
+                    with self._db(shard).begin() as txn, txn.cursor() as cursor:
+                        for k, v in cursor.getmulti(ks):
+                            out[decode_key(k)] = decode_value(v)
+                else:
+                    with self._transaction(shard).cursor() as cursor:
+                        for k, v in cursor.getmulti(ks):
+                            out[decode_key(k)] = decode_value(v)
+            except lmdb.PageNotFoundError:
+                pass
+        return out
+
+    def discard(self, key: KeyType) -> bool:
+        """
+        Delete ``key`` if present; return whether it was present.
+
+        Unlike ``del bd[key]`` this does not raise on a missing key, and
+        unlike :meth:`pop` it never reads the value back, so the deleted
+        value is not decoded only to be thrown away.
+        """
+        k, shard = self._encode_and_shard(key)
+        z = self._transaction(shard).delete(k)
+        # This raises ReadonlyError if `self.readonly` is True.
+        if z:
+            self._track_write(1)
+        return z
 
     def pop(self, key: KeyType, default=NOTSET) -> ValType:
         if self.readonly:
             raise ReadonlyError('pop: Permission denied')
 
-        k = self.encode_key(key)
-        shard = self._shard(k)
+        k, shard = self._encode_and_shard(key)
         v = self._transaction(shard).pop(k)
         if v is None:
             if default is NOTSET:
@@ -657,34 +1210,82 @@ class Bigdict(MutableMapping, Generic[ValType]):
             raise ReadonlyError('update: Permission denied')
 
         sharddata = defaultdict(list)
-        encode_key = self.encode_key
+        encode_and_shard = self._encode_and_shard
         encode_val = self.encode_value
-        shard = self._shard
         if isinstance(data, Mapping):
             other = data.items()
         else:
             other = data
         for k, v in itertools.chain(other, kwargs.items()):
-            kk = encode_key(k)
-            vv = encode_val(v)
-            s = shard(kk)
-            sharddata[s].append((kk, vv))
+            kk, s = encode_and_shard(k)
+            sharddata[s].append((kk, encode_val(v)))
 
         n = 0
         for sh, values in sharddata.items():
+            values.sort(key=itemgetter(0))
+            # LMDB inserts into a sorted B+tree; feeding `putmulti` pre-sorted
+            # keys reduces page splits and cursor repositioning.
+            # The sort is stable, so for duplicate keys the last one
+            # still wins, as in a dict update.
             with self._transaction(sh).cursor() as cursor:
-                cursor.putmulti(values)
+                cursor.putmulti(values, append=self._append_only)
                 n += len(values)
         self._track_write(n)
 
+    def bulk_load(self, data: Iterable[tuple[KeyType, ValType]]) -> None:
+        """
+        Load ``data`` into an empty (or right-extendable) dataset in one pass.
+
+        This is the fastest way to populate a new dataset. The whole input is
+        encoded and sharded up front, each shard's batch is sorted by encoded
+        key, and the batches are streamed through ``putmulti(append=True)``:
+        LMDB then skips the per-key tree descent and comparison and packs
+        leaf pages densely. Each shard is committed as soon as it is written,
+        releasing its dirty pages before the next shard starts.
+
+        The input must not contain duplicate keys, and every encoded key must
+        sort strictly after anything already stored in its shard; violations
+        surface as LMDB "key exists" errors. For incremental or unordered
+        writes use :meth:`update` or :meth:`__setitem__` instead.
+        """
+        if self.readonly:
+            raise ReadonlyError('bulk_load: Permission denied')
+
+        sharddata = defaultdict(list)
+        encode_and_shard = self._encode_and_shard
+        encode_val = self.encode_value
+        if isinstance(data, Mapping):
+            data = data.items()
+        for k, v in data:
+            kk, s = encode_and_shard(k)
+            sharddata[s].append((kk, encode_val(v)))
+
+        for sh, values in sorted(sharddata.items()):
+            values.sort(key=itemgetter(0))
+            txn = self._transaction(sh)
+            with txn.cursor() as cursor:
+                cursor.putmulti(values, append=True)
+            self._transactions.pop(sh)
+            txn.commit()
+
+        self.commit()
+        # Besides committing any transactions that were open before the
+        # load, this rebuilds the insert closure and resets the pending-write
+        # counter: `_setitem` may hold a bound `put` of a transaction that
+        # was just committed above, and using it would fail on a closed
+        # object (same reason `commit` and `destroy` rebuild it).
+
     def keys(self) -> Iterator[KeyType]:
         if not self.readonly:
             self.commit()
         decoder = self.decode_key
         for shard in self._shards():
             with self._db(shard).begin() as txn:
-                for k in txn.cursor().iternext(keys=True, values=False):
-                    yield decoder(k)
+                with txn.cursor() as cursor:
+                    # `iternext` is a C-level iterator; driving it through `map`
+                    # keeps the whole scan loop out of Python bytecode except
+                    # for the decode call itself.
+                    yield from map(decoder, cursor.iternext(keys=True, values=False))
 
     def values(self, *, buffers: bool = False) -> Iterator[ValType]:
         """
@@ -703,13 +1304,29 @@ class Bigdict(MutableMapping, Generic[ValType]):
                     write=(not self.readonly), buffers=buffers
                 ) as txn:
                     # TODO: is it possible to modify the yielded mem view? Not tested.
-                    for v in txn.cursor().iternext(keys=False, values=True):
-                        yield v
+                    with txn.cursor() as cursor:
+                        yield from cursor.iternext(keys=False, values=True)
+            elif type(self).decode_value is Bigdict.decode_value:
+                # The default decoder accepts any buffer and fully consumes
+                # it before returning, so feed it memoryviews straight off
+                # the mmap and skip one bytes copy per record. (Not done for
+                # overriding subclasses: their decoder may be a pass-through,
+                # and the views die with the transaction.)
+                with self._db(shard).begin(
+                    buffers=True
+                ) as txn:
+                    decoder = self.decode_value
+                    with txn.cursor() as cursor:
+                        yield from map(
+                            decoder, cursor.iternext(keys=False, values=True)
+                        )
             else:
                 with self._db(shard).begin() as txn:
                     decoder = self.decode_value
-                    for v in txn.cursor().iternext(keys=False, values=True):
-                        yield decoder(v)
+                    with txn.cursor() as cursor:
+                        yield from map(
+                            decoder, cursor.iternext(keys=False, values=True)
+                        )
 
     def items(self, *, buffers: bool = False) -> Iterator[tuple[KeyType, ValType]]:
         """
@@ -724,44 +1341,140 @@ class Bigdict(MutableMapping, Generic[ValType]):
             self.commit()
         for shard in self._shards():
             if buffers:
-                with self._db(shard).begin(buffers=buffers) as txn:
+                with self._db(shard).begin(
+                    buffers=buffers
+                ) as txn:
                     # TODO: is it possible to modify the yielded mem view? Not tested.
-                    for key, value in txn.cursor().iternext(keys=True, values=True):
-                        yield key, value
+                    with txn.cursor() as cursor:
+                        yield from cursor.iternext(keys=True, values=True)
+            elif type(self).decode_value is Bigdict.decode_value:
+                # Same zero-copy trick as in `values`: the default value
+                # decoder consumes the buffer within the call. Keys are
+                # materialized as bytes (a small copy) because `decode_key`
+                # takes bytes.
+                with self._db(shard).begin(
+                    buffers=True
+                ) as txn:
+                    decode_key = self.decode_key
+                    decode_val = self.decode_value
+                    with txn.cursor() as cursor:
+                        for key, value in cursor.iternext(keys=True, values=True):
+                            yield decode_key(bytes(key)), decode_val(value)
             else:
                 with self._db(shard).begin() as txn:
                     decode_key = self.decode_key
                     decode_val = self.decode_value
-                    for key, value in txn.cursor().iternext(keys=True, values=True):
-                        yield decode_key(key), decode_val(value)
+                    with txn.cursor() as cursor:
+                        for key, value in cursor.iternext(keys=True, values=True):
+                            yield decode_key(key), decode_val(value)
+
+    def items_parallel(
+        self, *, workers: int = 8, qsize: int = 1024
+    ) -> Iterator[tuple[KeyType, ValType]]:
+        """
+        Like :meth:`items`, but scan the shards concurrently with a small
+        group of threads, each reading its own shards through its own
+        transaction, feeding a bounded queue that this generator drains.
+
+        :meth:`items` finishes one shard's scan before starting the next;
+        for large multi-shard datasets on fast storage that leaves I/O queue
+        depth unused. Here the reads from the independent mmaps overlap.
+
+        The yielded elements follow no particular order.
+
+        Do not combine this with a non-zero ``max_open_envs``.
+        """
+        if self._num_pending_writes > 0:
+            self.commit()
+        shards = self._shards()
+        if len(shards) <= 1:
+            yield from self.items()
+            return
+
+        workers = min(workers, len(shards))
+        q = queue.Queue(maxsize=qsize)
+        stop = threading.Event()
+        done = object()
+
+        def put(z):
+            # A plain `q.put(z)` could block forever if this generator
+            # is abandoned mid-iteration; poll the stop flag instead.
+            while not stop.is_set():
+                try:
+                    q.put(z, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def scan(my_shards):
+            decode_key = self.decode_key
+            decode_val = self.decode_value
+            try:
+                for shard in my_shards:
+                    with self._db(shard).begin() as txn:
+                        with txn.cursor() as cursor:
+                            for k, v in cursor.iternext(keys=True, values=True):
+                                if not put((decode_key(k), decode_val(v))):
+                                    return
+            except Exception as e:
+                put(e)
+            finally:
+                put(done)
+
+        threads = [
+            threading.Thread(target=scan, args=(shards[i::workers],))
+            for i in range(workers)
+        ]
+        for t in threads:
+            t.start()
+        try:
+            n_done = 0
+            while n_done < workers:
+                z = q.get()
+                if z is done:
+                    n_done += 1
+                elif isinstance(z, Exception):
+                    raise z
+                else:
+                    yield z
+        finally:
+            stop.set()
+            for t in threads:
+                t.join()
 
     def __iter__(self) -> Iterator[KeyType]:
         return self.keys()
 
     def __contains__(self, key: KeyType) -> bool:
-        # Adapted from `__getitem__` but skip decoding the retrieved value.
-        k = self.encode_key(key)
-        shard = self._shard(k)
+        # Adapted from `__getitem__`, but use `cursor.set_key`, which only
+        # walks the B+tree nodes; the value is neither copied out nor decoded.
+        k, shard = self._encode_and_shard(key)
 
         try:
             if self.readonly:
-                with self._db(shard).begin() as txn:
-                    v = txn.get(k)
+                with self._db(shard).begin() as txn, txn.cursor() as cursor:
+                    return cursor.set_key(k)
             else:
-                v = self._transaction(shard).get(k)
+                with self._transaction(shard).cursor() as cursor:
+                    return cursor.set_key(k)
         except lmdb.PageNotFoundError:
             return False
-        return v is not None
 
     def __len__(self) -> int:
         # If `self.readonly` is True, this is correct as long as other writers have committed their writes.
         # If `self.readonly` is False, this is correct after this object's writings w/o the need for explicit commit.
+        # `_shards` only lists directories that exist on disk, so shards that
+        # were never written to are skipped without opening their environment.
         n = 0
         for shard in self._shards():
             if self.readonly:
-                with self._db(shard).begin() as txn:
-                    n += txn.stat()['entries']
+                # `Environment.stat` reads the B-tree metadata in one C call,
+                # without materializing a Python-level transaction.
+                n += self._db(shard).stat()['entries']
             else:
+                # The cached write transaction must be consulted so that this
+                # object's uncommitted writes are counted.
                 n += self._transaction(shard).stat()['entries']
         return n
 
@@ -769,9 +1482,8 @@ class Bigdict(MutableMapping, Generic[ValType]):
         # Similar to :meth:`__len__`.
         for shard in self._shards():
             if self.readonly:
-                with self._db(shard).begin() as txn:
-                    if txn.stat()['entries']:
-                        return True
+                if self._db(shard).stat()['entries']:
+                    return True
             else:
                 if self._transaction(shard).stat()['entries']:
                     return True
@@ -803,10 +1515,12 @@ class Bigdict(MutableMapping, Generic[ValType]):
         for x in self._transactions.values():
             x.abort()
         self._transactions.clear()
+        self._setitem = self._make_setitem()
         self._num_pending_writes = 0
         for x in self._dbs['dbs'].values():
             x.close()
         self._dbs['dbs'].clear()
+        self._shards_cache = None
         shutil.rmtree(self.path, ignore_errors=True)
         try:
             delattr(self, 'info')
@@ -817,7 +1531,11 @@ class Bigdict(MutableMapping, Generic[ValType]):
         """
         Perform a "copy with compaction" on the dataset.
         If successful, the older data files will be replaced by new ones.
-        If unsuccessful, the first failing shard will be left unchanged, and the exception is raised.
+        If unsuccessful, any failing shard will be left unchanged, and the exception is raised.
+
+        The shards are compacted in parallel by a small thread pool;
+        the copying happens in C with the GIL released, so the threads
+        make use of multiple cores.
 
         This could reduce file size considerably if
 
@@ -839,18 +1557,21 @@ class Bigdict(MutableMapping, Generic[ValType]):
         for d in self._dbs['dbs'].values():
             d.close()
         self._dbs['dbs'].clear()
-        size_old = 0  # bytes
-        size_new = 0  # bytes
 
         def get_folder_size(folder):
-            s = 0
-            for file in os.scandir(folder):
-                s += os.path.getsize(file)
-            return s
-
-        for shard in self._shards():
+            # `DirEntry.stat` uses the data gathered during the directory walk
+            # where possible, instead of a fresh `stat` syscall per file.
+            with os.scandir(folder) as entries:
+                return sum(
+                    e.stat(follow_symlinks=False).st_size
+                    for e in entries
+                    if e.is_file(follow_symlinks=False)
+                )
+
+        def compact_shard(shard):
+            # Returns (old size, new size) of the shard in bytes.
             shard_new = shard + '-new'
-            path_new = os.path.join(self.path, 'db', shard_new)
+            path_new = os.path.join(self._db_dir, shard_new)
 
             db = self._env(shard)
             os.mkdir(path_new)
@@ -868,16 +1589,30 @@ class Bigdict(MutableMapping, Generic[ValType]):
                 db.close()
                 db_new.close()
                 if n_new == n:
-                    path = os.path.join(self.path, 'db', shard)
-                    size_old += get_folder_size(path)
+                    path = self._shard_path(shard)
+                    size_old = get_folder_size(path)
                     shutil.rmtree(path)
                     os.rename(path_new, path)
-                    size_new += get_folder_size(path)
-                else:
-                    shutil.rmtree(path_new)
-                    raise RuntimeError(
-                        f'expecting {n} entries but got {n_new} for shard "{shard}"'
-                    )
+                    return size_old, get_folder_size(path)
+                shutil.rmtree(path_new)
+                raise RuntimeError(
+                    f'expecting {n} entries but got {n_new} for shard "{shard}"'
+                )
+
+        shards = self._shards()
+        if len(shards) > 1:
+            with ThreadPoolExecutor(
+                min(len(shards), os.cpu_count() or 1)
+            ) as executor:
+                sizes = list(executor.map(compact_shard, shards))
+                # The shards are independent; a failure in one does not
+                # affect the others, but the first exception is re-raised
+                # (by `executor.map`) after all of them have finished.
+        else:
+            sizes = [compact_shard(shard) for shard in shards]
+
+        size_old = sum(s[0] for s in sizes)  # bytes
+        size_new = sum(s[1] for s in sizes)  # bytes
 
         mb = 1048576  # 2**20
         size_old /= mb
@@ -0,0 +1,98 @@
+# Is it worthwhile to reuse a single `pickle.Unpickler` (bound to a `BytesIO`
+# that is rewound and rewritten per item) in `values()`/`items()` scans,
+# instead of calling `pickle.loads` once per item? And symmetrically, a
+# reused `pickle.Pickler` in `encode_value` instead of `pickle.dumps`?
+
+import io
+import pickle
+from time import perf_counter
+
+
+def make_data(n):
+    return [
+        pickle.dumps({'key_' + str(i): i, 'some': 'object_' + str(i)}, protocol=5)
+        for i in range(n)
+    ]
+
+
+def bench_loads(data, n):
+    t0 = perf_counter()
+    for _ in range(n):
+        for v in data:
+            pickle.loads(v)
+    t1 = perf_counter()
+    print('pickle.loads took', t1 - t0, 'seconds')
+
+
+def bench_reused_unpickler(data, n):
+    buf = io.BytesIO()
+    up = pickle.Unpickler(buf)
+    t0 = perf_counter()
+    for _ in range(n):
+        for v in data:
+            buf.seek(0)
+            buf.truncate()
+            buf.write(v)
+            buf.seek(0)
+            up.load()
+    t1 = perf_counter()
+    print('reused Unpickler took', t1 - t0, 'seconds')
+
+
+def make_objects(n):
+    return [{'key_' + str(i): i, 'some': 'object_' + str(i)} for i in range(n)]
+
+
+def bench_dumps(objs, n):
+    t0 = perf_counter()
+    for _ in range(n):
+        for o in objs:
+            pickle.dumps(o, protocol=5)
+    t1 = perf_counter()
+    print('pickle.dumps took', t1 - t0, 'seconds')
+
+
+def bench_reused_pickler(objs, n):
+    buf = io.BytesIO()
+    t0 = perf_counter()
+    for _ in range(n):
+        for o in objs:
+            buf.seek(0)
+            buf.truncate()
+            pickle.Pickler(buf, protocol=5).dump(o)
+            buf.getvalue()
+    t1 = perf_counter()
+    print('reused BytesIO + Pickler took', t1 - t0, 'seconds')
+
+
+def main():
+    data = make_data(200000)
+    bench_loads(data, 10)
+    print()
+    bench_reused_unpickler(data, 10)
+    print()
+    objs = make_objects(200000)
+    bench_dumps(objs, 10)
+    print()
+    bench_reused_pickler(objs, 10)
+
+
+if __name__ == '__main__':
+    main()
+
+
+# Result on 2026/8/31, CPython 3.11:
+#
+# pickle.loads took 1.02 seconds
+#
+# reused Unpickler took 2.83 seconds
+#
+# pickle.dumps took 0.83 seconds
+#
+# reused BytesIO + Pickler took 2.50 seconds
+#
+# `pickle.loads`/`pickle.dumps` go through the C `_pickle` module in one
+# call; the rewind/truncate/getvalue dance on the BytesIO costs far more
+# than the (un)pickler construction it saves --- the C implementation
+# manages an internal output buffer that `dumps` reuses anyway. Keep
+# `pickle.dumps`/`pickle.loads` in `encode_value`/`decode_value`.
@@ -9,13 +9,18 @@ import shutil
 from abc import ABC, abstractmethod
 from collections import defaultdict
 from contextlib import closing, suppress
-from random import randrange
+from random import choices
 from typing import Any, Callable, ContextManager, DefaultDict, Dict, Iterable, List, Sequence, TextIO
 
 from genutility.iter import batch
 from genutility.time import MeasureTime
 from pytablewriter import MarkdownTableWriter
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 import lmdbm
 import lmdbm.lmdbm
 from bigdict import Bigdict
@@ -31,6 +36,23 @@ BATCH_SIZE = 1000  # the speed gain is not very sensitive to this batch size as
 
 
 
+_data_cache = {}
+
+
+def _prebuilt_data(size):
+    # Keys and values are built once per size and reused across benchmarks
+    # and repetitions, so string formatting and dict construction happen
+    # outside the timed loops. Only one size is cached at a time to keep
+    # memory bounded for the large runs.
+    data = _data_cache.get(size)
+    if data is None:
+        _data_cache.clear()
+        keys = ["key_" + str(i) for i in range(size)]
+        values = [{"some": "object_" + str(i)} for i in range(size)]
+        data = _data_cache[size] = (keys, values)
+    return data
+
+
 class BaseBenchmark(ABC):
     def __init__(self, db_tpl, db_type):
         self.available = True
@@ -71,58 +93,87 @@ class BaseBenchmark(ABC):
 
         return value
 
+    # In the `measure_*` loops below, `self.encode`/`self.decode`/`t.get`
+    # etc. are bound to locals before the loop: an attribute lookup per
+    # item is interpreter overhead that gets charged to the store under
+    # test, and it is visible at the small-N end where per-op times are
+    # microseconds.
+
     def measure_writes(self, N: int) -> None:
         with MeasureTime() as t, self.open() as db:
-            for key, value in self.generate_data(N):
-                if t.get() > MAX_TIME:
+            encode = self.encode
+            commit = self.commit
+            get_time = t.get
+            for i, (key, value) in enumerate(self.generate_data(N)):
+                # Poll the clock every 64 items, not every item: the
+                # timeout only needs second-level resolution and the
+                # per-item clock call is measurable at small N.
+                if not (i & 63) and get_time() > MAX_TIME:
                     break
-                db[key] = self.encode(value)
-                self.commit()
+                db[key] = encode(value)
+                commit()
         if t.get() < MAX_TIME:
             self.write = t.get()
         self.print_time("write", N, t)
 
     def measure_batch_writes(self, N: int) -> None:
         with MeasureTime() as t, self.open() as db:
+            encode = self.encode
+            commit = self.commit
+            get_time = t.get
+            update = db.update
             for pairs in batch(self.generate_data(N), BATCH_SIZE):
-                if t.get() > MAX_TIME:
+                if get_time() > MAX_TIME:
                     break
-                db.update({key: self.encode(value) for key, value in pairs})
-                self.commit()
+                # A list of pairs, not a dict: both stores' `update` take
+                # either, and the list skips the per-batch hashmap build.
+                update([(key, encode(value)) for key, value in pairs])
+                commit()
         if t.get() < MAX_TIME:
             self.batch_write = t.get()
         self.print_time("batch write", N, t)
 
     def measure_reads(self, N: int) -> None:
         with MeasureTime() as t, self.open() as db:
-            for key in self.random_keys(N, N):
-                if t.get() > MAX_TIME:
+            decode = self.decode
+            get_time = t.get
+            getitem = db.__getitem__
+            for i, key in enumerate(self.random_keys(N, N)):
+                # Same 1-in-64 clock polling as in `measure_writes`.
+                if not (i & 63) and get_time() > MAX_TIME:
                     break
-                self.decode(db[key])
+                decode(getitem(key))
         if t.get() < MAX_TIME:
             self.read = t.get()
         self.print_time("read", N, t)
 
     def measure_batch_reads(self, N: int) -> None:
         with MeasureTime() as t, self.open() as db:
+            decode = self.decode
+            get_time = t.get
+            getmany = db.getmany
             for keys in batch(self.random_keys(N, N), BATCH_SIZE):
-                if t.get() > MAX_TIME:
+                if get_time() > MAX_TIME:
                     break
-                _ = [self.decode(v) for k, v in db.stream_get(keys)]
+                _ = [decode(v) for v in getmany(keys).values()]
         if t.get() < MAX_TIME:
             self.batch_read = t.get()
         self.print_time("batch read", N, t)
 
     def measure_combined(self, read=1, write=10, repeat=100) -> None:
         with MeasureTime() as t, self.open() as db:
+            encode = self.encode
+            decode = self.decode
+            commit = self.commit
+            get_time = t.get
             for _ in range(repeat):
-                if t.get() > MAX_TIME:
+                if get_time() > MAX_TIME:
                     break
                 for key, value in self.generate_data(read):  # ??
-                    db[key] = self.encode(value)
-                    self.commit()
+                    db[key] = encode(value)
+                    commit()
                 for key in self.random_keys(10, write):  # ??
-                    self.decode(db[key])
+                    decode(db[key])
         if t.get() < MAX_TIME:
             self.combined = t.get()
         self.print_time("combined", (read + write) * repeat, t)
@@ -135,27 +186,45 @@ class BaseBenchmark(ABC):
 
     @staticmethod
     def generate_data(size):
-        for i in range(size):
-            yield "key_" + str(i), {"some": "object_" + str(i)}
+        keys, values = _prebuilt_data(size)
+        return zip(keys, values)
 
     @staticmethod
     def random_keys(num, size):
-        for _ in range(num):
-            yield "key_" + str(randrange(0, size))  # nosec
+        keys, _ = _prebuilt_data(size)
+        return choices(keys, k=num)  # nosec
 
 
 class JsonEncodedBenchmark(BaseBenchmark):
-    def encode(self, value):
-        return json.dumps(value)
+    # The codec runs once per item inside the timed loops, so its speed
+    # matters as much as the store's. `orjson.dumps` returns bytes, which
+    # both lmdbm and bigdict accept directly (no Latin-1 encode pass).
+    if orjson is None:
+        def encode(self, value):
+            return json.dumps(value)
+
+        def decode(self, value):
+            return json.loads(value)
+    else:
+        def encode(self, value):
+            return orjson.dumps(value)
 
-    def decode(self, value):
-        return json.loads(value)
+        def decode(self, value):
+            return orjson.loads(value)
 
 
 class DummyPickleBenchmark(BaseBenchmark):
+    # `commit` used to serialize and rewrite the whole dict per call; with
+    # `measure_writes` committing after every item that is O(N^2) bytes
+    # written, which made this baseline unusable past tiny N. The file is
+    # now written once, when the database is closed; `commit` stays the
+    # inherited no-op, like the real stores whose commits are cheap.
     class MyDict(dict):
+        flush = None
+
         def close(self):
-            pass
+            if self.flush is not None:
+                self.flush()
 
     def __init__(self, db_tpl):
         super().__init__(db_tpl, "dummypickle")
@@ -167,19 +236,24 @@ class DummyPickleBenchmark(BaseBenchmark):
                 self.native_dict = self.MyDict(pickle.load(f))  # nosec
         else:
             self.native_dict = self.MyDict()
+        self.native_dict.flush = self._flush
         return closing(self.native_dict)
 
-    def commit(self):
+    def _flush(self):
         tmp_file = self.path + ".tmp"
         with open(tmp_file, "wb") as f:
-            pickle.dump(self.native_dict, f)
+            pickle.dump(self.native_dict, f, protocol=pickle.HIGHEST_PROTOCOL)
         shutil.move(tmp_file, self.path)
 
 
 class DummyJsonBenchmark(BaseBenchmark):
+    # Same once-at-close flush as DummyPickleBenchmark.
     class MyDict(dict):
+        flush = None
+
         def close(self):
-            pass
+            if self.flush is not None:
+                self.flush()
 
     def __init__(self, db_tpl):
         super().__init__(db_tpl, "dummyjson")
@@ -191,9 +265,10 @@ class DummyJsonBenchmark(BaseBenchmark):
                 self.native_dict = self.MyDict(json.load(f))
         else:
             self.native_dict = self.MyDict()
+        self.native_dict.flush = self._flush
         return closing(self.native_dict)
 
-    def commit(self):
+    def _flush(self):
         tmp_file = self.path + ".tmp"
         with open(tmp_file, "w") as f:
             json.dump(self.native_dict, f, ensure_ascii=False, check_circular=False, sort_keys=False)
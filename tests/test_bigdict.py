@@ -52,6 +52,12 @@ def test_basics():
     assert 'a' not in bd
     assert len(bd) == 4
 
+    assert bd.discard('c')
+    assert 'c' not in bd
+    assert not bd.discard('c')
+    assert len(bd) == 3
+    bd['c'] = 4
+
     bd2 = Bigdict(bd.path, map_size_mb=32, readonly=True)
     # apparently `map_size` is not an attribute of the database file---you
     # can choose another `map_size` when reading.
@@ -102,6 +108,9 @@ def test_basics():
     with pytest.raises(ReadonlyError):
         bd2.pop('a')
 
+    with pytest.raises(ReadonlyError):
+        bd2.discard('b')
+
     with pytest.raises(ReadonlyError):
         bd2.setdefault('a', 2)
 
@@ -117,6 +126,47 @@ def test_basics():
     bd.destroy()
 
 
+class Blob:
+    # A class that pickles its payload out-of-band under pickle protocol 5.
+
+    def __init__(self, data):
+        self.data = bytes(data)
+
+    def __reduce_ex__(self, protocol):
+        if protocol >= 5:
+            return (type(self), (pickle.PickleBuffer(self.data),))
+        return (type(self), (self.data,))
+
+    def __eq__(self, other):
+        return type(other) is type(self) and other.data == self.data
+
+
+def test_value_out_of_band():
+    db = Bigdict.new()
+    blob = Blob(b'x' * 1000000)
+    db['blob'] = blob
+    db['plain'] = {'a': 1}
+    db['raw'] = b'some raw bytes'
+    db.flush()
+
+    assert db['blob'] == blob
+    assert db['plain'] == {'a': 1}
+    assert db['raw'] == b'some raw bytes'
+
+    db.commit()
+    # The reads above re-opened `db`'s write transaction; close it out
+    # before a second object opens the same environment.
+
+    db2 = Bigdict(db.path)
+    assert db2['blob'] == blob
+    assert db2['plain'] == {'a': 1}
+    assert db2['raw'] == b'some raw bytes'
+    assert dict(db2.items()) == dict(db.items())
+
+    db2.close()
+    db.destroy()
+
+
 def test_pickle():
     data = Bigdict.new()
     data['1'] = 3
@@ -281,6 +331,139 @@ def test_shard():
     assert sorted(data) == sorted(db3)  # calls `db.keys()`
     assert sorted(data) == sorted(db3.values())
 
+    db2.close()
+    db3.close()
+    db.destroy()
+
+
+def test_shard_growth():
+    db = Bigdict.new(shard_level=16)
+
+    data = [str(uuid4()) for _ in range(1000)]
+    db[data[0]] = 0
+    db.flush()
+
+    # A reader opened while the dataset is partially populated (not all
+    # shard directories exist yet) must pick up shards created by the
+    # writer afterwards.
+    db2 = Bigdict(db.path)
+    assert len(db2) == 1
+
+    for i, d in enumerate(data[1:], 1):
+        db[d] = i
+    db.commit()
+
+    assert len(db2) == 1000
+    assert sorted(db2) == sorted(data)
+
+    db2.close()
+    db.destroy()
+
+
+def test_shard_hash():
+    N = 2000
+    db = Bigdict.new(shard_level=16, shard_hash='crc32')
+
+    data = [str(uuid4()) for _ in range(N)]
+    for d in data:
+        db[d] = d
+    db.flush()
+
+    assert len(db._shards()) == 16
+    assert len(db) == N
+    for d in data:
+        assert db[d] == d
+
+    db.commit()
+    # The reads above went through `db`'s write transactions; commit them
+    # before opening a second object on the same path (see `as_readonly`
+    # for why overlapping open environments in one process are delicate).
+
+    # A reader picks up the hash choice from info.json.
+    db2 = Bigdict(db.path)
+    assert db2._shard_hash == 'crc32'
+    assert sorted(data) == sorted(db2)
+
+    db2.close()
+    db.destroy()
+
+
+def test_bulk_load():
+    N = 3000
+    db = Bigdict.new(shard_level=16)
+
+    data = {str(uuid4()): i for i in range(N)}
+    db.bulk_load(data)
+
+    assert len(db) == N
+    assert sorted(db.items()) == sorted(data.items())
+
+    # Plain writes must keep working after a load: the insert closure
+    # must not hold on to the transactions `bulk_load` committed.
+    key = str(uuid4())
+    db[key] = 'x'
+    assert db[key] == 'x'
+    assert len(db) == N + 1
+
+    db.destroy()
+
+
+def test_getmany():
+    N = 2000
+    db = Bigdict.new(shard_level=16)
+
+    data = {str(uuid4()): i for i in range(N)}
+    db.update(data)
+
+    keys = list(data)[: N // 2] + ['no-such-key']
+    out = db.getmany(keys)
+    assert out == {k: data[k] for k in keys[:-1]}
+
+    db.flush()
+    db2 = Bigdict(db.path)
+    assert db2.getmany(keys) == out
+
+    db2.close()
+    db.destroy()
+
+
+def test_items_parallel():
+    N = 5000
+    db = Bigdict.new(shard_level=16)
+
+    data = {str(uuid4()): i for i in range(N)}
+    db.update(data)
+    db.flush()
+
+    assert sorted(db.items_parallel()) == sorted(data.items())
+    assert sorted(db.items_parallel(workers=3, qsize=100)) == sorted(data.items())
+
+    # Abandoning the generator mid-iteration must not hang.
+    it = db.items_parallel()
+    next(it)
+    it.close()
+
+    db.destroy()
+
+
+def test_max_open_envs():
+    N = 1000
+    db = Bigdict.new(shard_level=16)
+
+    data = [str(uuid4()) for _ in range(N)]
+    for d in data:
+        db[d] = d
+    db.flush()
+
+    db2 = Bigdict(db.path, max_open_envs=4)
+    for d in data:
+        assert db2[d] == d
+    assert len(db2._dbs['dbs']) <= 4
+
+    assert sorted(data) == sorted(db2)  # calls `db2.keys()`
+    assert len(db2._dbs['dbs']) <= 4
+
+    db2.close()
     db.destroy()
 
 
@@ -324,6 +507,7 @@ def test_buffers():
     z = next(vv)
     assert isinstance(z, bytes)
     assert z == b'defg'
+    vv.close()
 
     vv = db.values(buffers=True)
     z = next(vv)
@@ -346,6 +530,21 @@ def test_buffers():
     assert bytes(k) == b'b'
     assert bytes(v) == b'defg'
 
+    # Dispose of the suspended generators while the environment is still
+    # open; their read transactions cannot be cleaned up after `destroy`.
+    del vv, zz
+    db.flush()
+
+    # A readonly object with a pass-through `decode_value` must get
+    # `bytes` out of `__getitem__`, not a view that dies with the
+    # per-call read transaction.
+    db2 = BufferDict(db.path)
+    z = db2['a']
+    assert isinstance(z, bytes)
+    assert z == b'abc'
+    db2.close()
+    db.destroy()
+
 
 def test_as_readonly():
     db = Bigdict.new()